@@ -3,48 +3,91 @@
 Check all containers in the Swift account
 """
 
-import subprocess
-from swiftclient import client as swift_client
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
+from swift_common import GIB, get_conn, load_rclone_auth, map_concurrently, parse_account
 
-def load_rclone_auth():
-    result = subprocess.run(['rclone', 'config', 'show', 'swissbackup'], capture_output=True, text=True, check=True)
-    config_lines = result.stdout.strip().split('\n')
-    config = {}
-    
-    for line in config_lines:
-        if ' = ' in line:
-            key, value = line.split(' = ', 1)
-            config[key.strip()] = value.strip()
+
+def to_http_date(timestamp):
+    """Render a listing timestamp (UTC ISO 8601) like a Last-Modified header
+
+    e.g. '2025-01-01T12:00:00.000000' -> 'Wed, 01 Jan 2025 12:00:00 GMT'.
+    Unparseable values are returned unchanged.
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return timestamp
+    return format_datetime(parsed.replace(microsecond=0), usegmt=True)
+
+
+def fetch_container_details(conn, container):
+    """Return (last modified, sample objects, error) for one container"""
+    name = container['name']
+    count = container['count']
+    try:
+        # Newer Swift releases include last_modified in the account listing,
+        # which saves a HEAD request per container. It is an ISO timestamp,
+        # so convert it to the HTTP date format the HEAD header uses.
+        last_modified = container.get('last_modified')
+        if last_modified is not None:
+            last_modified = to_http_date(last_modified)
+        else:
+            container_info = conn.head_container(name)
+            last_modified = container_info.get('last-modified', 'unknown')
+        
+        objects = []
+        if count > 0 and count <= 20:  # Only show details for small containers
+            headers, objects = conn.get_container(name, limit=20)
+        elif count > 20:
+            headers, objects = conn.get_container(name, limit=5)
+        return last_modified, objects, None
+    except Exception as e:
+        return None, None, e
+
+
+def print_containers_json(conn):
+    """Emit one NDJSON line per container, then an account summary line"""
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    account = parse_account(conn.head_account())
+    headers, containers = conn.get_account()
     
-    return {
-        'authurl': config.get('auth', ''),
-        'user': config.get('user', ''),
-        'key': config.get('key', ''),
-        'tenant_name': config.get('tenant', ''),
-        'auth_version': '3',
-        'os_options': {
-            'user_domain_name': config.get('domain', 'default'),
-            'project_domain_name': config.get('tenant_domain', 'default'),
-            'project_name': config.get('tenant', ''),
-            'region_name': config.get('region', 'RegionOne')
-        }
-    }
+    lines = [
+        dumps({
+            'name': container['name'],
+            'count': container['count'],
+            'bytes': container['bytes'],
+            'last_modified': container.get('last_modified')
+        })
+        for container in containers
+    ]
+    lines.append(dumps({
+        'containers': account.containers,
+        'objects': account.objects,
+        'bytes': account.bytes,
+        'calculated_bytes': sum(container['bytes'] for container in containers)
+    }))
+    sys.stdout.write("\n".join(lines))
+    sys.stdout.write("\n")
 
 
 def check_all_containers():
     auth_config = load_rclone_auth()
-    conn = swift_client.Connection(**auth_config)
+    conn = get_conn(auth_config)
     
     print("="*80)
     print("ALL CONTAINERS IN SWIFT ACCOUNT")
     print("="*80)
     
     # Get account info
-    account_info = conn.head_account()
-    print(f"Account total containers: {account_info.get('x-account-container-count')}")
-    print(f"Account total objects: {account_info.get('x-account-object-count')}")
-    print(f"Account total bytes: {account_info.get('x-account-bytes-used')} ({int(account_info.get('x-account-bytes-used', 0)) / (1024**3):.3f} GB)")
+    account = parse_account(conn.head_account())
+    print(f"Account total containers: {account.containers}")
+    print(f"Account total objects: {account.objects}")
+    print(f"Account total bytes: {account.bytes} ({account.gib:.3f} GB)")
     
     # List all containers
     headers, containers = conn.get_account()
@@ -54,50 +97,61 @@ def check_all_containers():
     
     total_account_size = 0
     
-    for container in containers:
+    # Container details are independent round-trips, so fetch them concurrently
+    details = map_concurrently(conn, fetch_container_details, containers)
+    
+    for container, (last_modified, objects, error) in zip(containers, details):
         name = container['name']
         count = container['count']
         size = container['bytes']
-        size_gb = size / (1024**3)
+        size_gb = size / GIB
         total_account_size += size
         
         print(f"\nContainer: {name}")
         print(f"  Objects: {count}")
         print(f"  Size: {size:,} bytes ({size_gb:.3f} GB)")
         
-        # Get detailed info about each container
-        try:
-            container_info = conn.head_container(name)
-            print(f"  Last modified: {container_info.get('last-modified', 'unknown')}")
-            
-            # List objects in each container
-            if count > 0 and count <= 20:  # Only show details for small containers
-                headers, objects = conn.get_container(name, limit=20)
-                print(f"  Objects:")
-                for obj in objects:
-                    obj_size_mb = obj['bytes'] / (1024**2)
-                    print(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB  {obj['last_modified']}")
-            elif count > 20:
-                headers, objects = conn.get_container(name, limit=5)
-                print(f"  First 5 objects:")
-                for obj in objects:
-                    obj_size_mb = obj['bytes'] / (1024**2)
-                    print(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB  {obj['last_modified']}")
-                print(f"    ... and {count - 5} more objects")
-                
-        except Exception as e:
-            print(f"  ERROR getting container details: {e}")
+        if error is not None:
+            print(f"  ERROR getting container details: {error}")
+            continue
+        
+        print(f"  Last modified: {last_modified}")
+        
+        # List objects in each container
+        if count > 0 and count <= 20:
+            print(f"  Objects:")
+            for obj in objects:
+                obj_size_mb = obj['bytes'] / (1024**2)
+                print(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB  {obj['last_modified']}")
+        elif count > 20:
+            print(f"  First 5 objects:")
+            for obj in objects:
+                obj_size_mb = obj['bytes'] / (1024**2)
+                print(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB  {obj['last_modified']}")
+            print(f"    ... and {count - 5} more objects")
     
-    print(f"\nCalculated total size: {total_account_size:,} bytes ({total_account_size / (1024**3):.3f} GB)")
-    reported_size = int(account_info.get('x-account-bytes-used', 0))
-    print(f"Account reported size: {reported_size:,} bytes ({reported_size / (1024**3):.3f} GB)")
+    print(f"\nCalculated total size: {total_account_size:,} bytes ({total_account_size / GIB:.3f} GB)")
+    reported_size = account.bytes
+    print(f"Account reported size: {reported_size:,} bytes ({account.gib:.3f} GB)")
     
     if abs(total_account_size - reported_size) > 1000:  # Allow small differences
         diff = reported_size - total_account_size
-        print(f"⚠ Difference: {diff:,} bytes ({diff / (1024**3):.3f} GB)")
+        print(f"⚠ Difference: {diff:,} bytes ({diff / GIB:.3f} GB)")
     else:
         print("✓ Sizes match!")
 
 
+def main():
+    parser = argparse.ArgumentParser(description='Check all containers in the Swift account')
+    parser.add_argument('--json', action='store_true',
+                        help='Emit containers and an account summary as NDJSON instead of the report')
+    args = parser.parse_args()
+    
+    if args.json:
+        print_containers_json(get_conn(load_rclone_auth()))
+    else:
+        check_all_containers()
+
+
 if __name__ == '__main__':
-    check_all_containers()
+    main()
@@ -6,59 +6,44 @@ This script uses various Swift API parameters to find hidden or inaccessible obj
 that might be causing storage discrepancies.
 """
 
+import functools
 import os
 import sys
 import subprocess
-from swiftclient import client as swift_client
 from swiftclient.exceptions import ClientException
 
+from swift_common import get_bytes, get_conn, iter_objects, load_rclone_auth, parse_container
 
-def load_rclone_auth():
-    """Load Swift credentials from rclone configuration"""
-    try:
-        result = subprocess.run(
-            ['rclone', 'config', 'show', 'swissbackup'],
-            capture_output=True, text=True, check=True
-        )
-        
-        config_lines = result.stdout.strip().split('\n')
-        config = {}
-        
-        for line in config_lines:
-            if ' = ' in line:
-                key, value = line.split(' = ', 1)
-                config[key.strip()] = value.strip()
-        
-        auth_config = {
-            'authurl': config.get('auth', ''),
-            'user': config.get('user', ''),
-            'key': config.get('key', ''),
-            'tenant_name': config.get('tenant', ''),
-            'auth_version': '3',
-            'os_options': {
-                'user_domain_name': config.get('domain', 'default'),
-                'project_domain_name': config.get('tenant_domain', 'default'),
-                'project_name': config.get('tenant', ''),
-                'region_name': config.get('region', 'RegionOne')
-            }
-        }
-        
-        return auth_config
-        
-    except Exception as e:
-        print(f"ERROR: Failed to load rclone config: {e}")
-        return None
+
+@functools.lru_cache(maxsize=1)
+def swift_cli_env():
+    """Build the environment for the swift CLI once from the rclone credentials"""
+    auth_config = load_rclone_auth()
+    env = os.environ.copy()
+    env.update({
+        'OS_AUTH_URL': auth_config['authurl'],
+        'OS_USERNAME': auth_config['user'],
+        'OS_PASSWORD': auth_config['key'],
+        'OS_PROJECT_NAME': auth_config['tenant_name'],
+        'OS_PROJECT_DOMAIN_NAME': auth_config['os_options']['project_domain_name'],
+        'OS_USER_DOMAIN_NAME': auth_config['os_options']['user_domain_name'],
+        'OS_REGION_NAME': auth_config['os_options']['region_name'],
+        'OS_IDENTITY_API_VERSION': '3'
+    })
+    return env
 
 
 def deep_container_scan(container_name='mattermost-backups'):
     """Perform deep scan of container with various parameters"""
     
-    auth_config = load_rclone_auth()
-    if not auth_config:
+    try:
+        auth_config = load_rclone_auth()
+    except Exception as e:
+        print(f"ERROR: Failed to load rclone config: {e}")
         return
     
     try:
-        conn = swift_client.Connection(**auth_config)
+        conn = get_conn(auth_config)
         
         print("="*80)
         print("DEEP CONTAINER INVESTIGATION")
@@ -77,11 +62,14 @@ def deep_container_scan(container_name='mattermost-backups'):
         print("\n2. Different Listing Approaches:")
         
         # Standard listing
-        print("\n  a) Standard listing (full_listing=True):")
+        print("\n  a) Standard listing (paged):")
+        visible_objects = 0
         try:
-            headers, objects = conn.get_container(container_name, full_listing=True)
-            print(f"     Found {len(objects)} objects")
-            total_size = sum(obj['bytes'] for obj in objects)
+            total_size = 0
+            for obj in iter_objects(conn, container_name):
+                total_size += get_bytes(obj)
+                visible_objects += 1
+            print(f"     Found {visible_objects} objects")
             print(f"     Total size: {total_size:,} bytes")
         except Exception as e:
             print(f"     ERROR: {e}")
@@ -89,34 +77,32 @@ def deep_container_scan(container_name='mattermost-backups'):
         # Listing with different parameters
         print("\n  b) Listing with query parameters:")
         try:
-            headers, objects = conn.get_container(
-                container_name, 
-                full_listing=True,
-                query_string='format=json'
-            )
-            print(f"     Found {len(objects)} objects with format=json")
+            count = sum(1 for obj in iter_objects(conn, container_name, query_string='format=json'))
+            print(f"     Found {count} objects with format=json")
         except Exception as e:
             print(f"     ERROR: {e}")
         
-        # Try to list with different prefixes to catch hidden objects
-        print("\n  c) Listing with various prefixes:")
+        # Try different prefixes to catch hidden objects. One delimiter
+        # listing returns every top-level pseudo-directory and object, so
+        # the prefixes are matched locally instead of walking the container
+        # once per prefix.
+        print("\n  c) Top-level entries matching various prefixes (delimiter='/'):")
         prefixes_to_try = ['', '20', '.', '_', 'backup', 'old', 'tmp']
         
-        for prefix in prefixes_to_try:
-            try:
-                headers, objects = conn.get_container(
-                    container_name, 
-                    prefix=prefix,
-                    full_listing=True
-                )
-                if objects:
-                    print(f"     Prefix '{prefix}': {len(objects)} objects")
-                    for obj in objects[:3]:  # Show first 3
-                        print(f"       {obj['name']}")
-                    if len(objects) > 3:
-                        print(f"       ... and {len(objects) - 3} more")
-            except Exception as e:
-                print(f"     Prefix '{prefix}' ERROR: {e}")
+        try:
+            top_level = [entry.get('subdir', entry.get('name'))
+                         for entry in iter_objects(conn, container_name, delimiter='/')]
+            
+            for prefix in prefixes_to_try:
+                matches = [name for name in top_level if name.startswith(prefix)]
+                if matches:
+                    print(f"     Prefix '{prefix}': {len(matches)} top-level entries")
+                    for name in matches[:3]:  # Show first 3
+                        print(f"       {name}")
+                    if len(matches) > 3:
+                        print(f"       ... and {len(matches) - 3} more")
+        except Exception as e:
+            print(f"     ERROR: {e}")
         
         # 3. Try to find deleted/versioned objects
         print("\n3. Checking for versioned or deleted objects:")
@@ -129,8 +115,8 @@ def deep_container_scan(container_name='mattermost-backups'):
                 print(f"   Found potential version containers: {[c['name'] for c in version_containers]}")
                 for vc in version_containers:
                     try:
-                        headers, objects = conn.get_container(vc['name'], full_listing=True)
-                        print(f"   {vc['name']}: {len(objects)} objects, {vc['bytes']} bytes")
+                        count = sum(1 for obj in iter_objects(conn, vc['name']))
+                        print(f"   {vc['name']}: {count} objects, {vc['bytes']} bytes")
                     except Exception as e:
                         print(f"   {vc['name']}: ERROR {e}")
             else:
@@ -141,18 +127,7 @@ def deep_container_scan(container_name='mattermost-backups'):
         # 4. Direct Swift CLI comparison
         print("\n4. Direct Swift CLI comparison:")
         
-        # Set up environment
-        env = os.environ.copy()
-        env.update({
-            'OS_AUTH_URL': auth_config['authurl'],
-            'OS_USERNAME': auth_config['user'],
-            'OS_PASSWORD': auth_config['key'],
-            'OS_PROJECT_NAME': auth_config['tenant_name'],
-            'OS_PROJECT_DOMAIN_NAME': auth_config['os_options']['project_domain_name'],
-            'OS_USER_DOMAIN_NAME': auth_config['os_options']['user_domain_name'],
-            'OS_REGION_NAME': auth_config['os_options']['region_name'],
-            'OS_IDENTITY_API_VERSION': '3'
-        })
+        env = swift_cli_env()
         
         try:
             # Swift stat container
@@ -185,8 +160,7 @@ def deep_container_scan(container_name='mattermost-backups'):
         print("SUMMARY OF FINDINGS")
         print("="*80)
         
-        visible_objects = len(objects) if 'objects' in locals() else 0
-        reported_objects = int(container_info.get('x-container-object-count', 0))
+        reported_objects = parse_container(container_info).objects
         
         print(f"Container metadata reports: {reported_objects} objects")
         print(f"Visible through API listing: {visible_objects} objects")
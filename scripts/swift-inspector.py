@@ -7,7 +7,7 @@ between reported storage usage and actual file sizes.
 
 Features:
 - Direct Swift API access for detailed inspection
-- Compare rclone vs Swift API results
+- Report rclone 'about'/'size' figures from the Swift API
 - Find hidden objects, versions, or metadata
 - Calculate storage overhead and allocation differences
 - Detailed object listing with sizes and metadata
@@ -22,6 +22,9 @@ import json
 import subprocess
 import argparse
 import re
+from contextlib import redirect_stdout
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
@@ -33,43 +36,57 @@ except ImportError:
     print("Install with: sudo apt install python3-swiftclient")
     sys.exit(1)
 
+from swift_common import (
+    GIB, LISTING_PAGE_SIZE, get_bytes, get_conn, iter_objects, load_rclone_auth,
+    parse_account, parse_container
+)
+
+# Backup directories are named YYYYMMDD_HHMMSS by backup-mattermost.sh
+_BACKUP_RE = re.compile(r'\d{8}_\d{6}\Z').match
+
+
+@dataclass(slots=True)
+class BackupDir:
+    """Objects found under one backup directory"""
+    objects: int
+    total_size: int
+    files: List[Dict]
+
+
+def _fmt_size(num_bytes: int) -> str:
+    """Format a byte count the way rclone does, e.g. '1.500 GiB (1610612736 Byte)'"""
+    value = float(num_bytes)
+    for unit in ('Byte', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if value < 1024 or unit == 'TiB':
+            break
+        value /= 1024
+    if unit == 'Byte':
+        return f"{num_bytes} Byte"
+    return f"{value:.3f} {unit} ({num_bytes} Byte)"
+
+
+def _write_lines(lines: List[str]):
+    """Write a batch of output lines with a single call"""
+    if lines:
+        sys.stdout.write("\n".join(lines))
+        sys.stdout.write("\n")
+
 
 class SwiftInspector:
     def __init__(self):
         self.auth_config = {}
         self.swift_conn = None
+        self.account_stats = None
         self.container_name = "mattermost-backups"
+        self._objects_cache = None
+        self._objects_bytes = 0
+        self._container_info = None
+        self.container_stats = None
         
     def load_rclone_config(self) -> bool:
         """Load Swift credentials from rclone configuration"""
         try:
-            result = subprocess.run(
-                ['rclone', 'config', 'show', 'swissbackup'],
-                capture_output=True, text=True, check=True
-            )
-            
-            config_lines = result.stdout.strip().split('\n')
-            config = {}
-            
-            for line in config_lines:
-                if ' = ' in line:
-                    key, value = line.split(' = ', 1)
-                    config[key.strip()] = value.strip()
-            
-            # Map rclone config to Swift auth parameters
-            self.auth_config = {
-                'authurl': config.get('auth', ''),
-                'user': config.get('user', ''),
-                'key': config.get('key', ''),
-                'tenant_name': config.get('tenant', ''),
-                'auth_version': '3',
-                'os_options': {
-                    'user_domain_name': config.get('domain', 'default'),
-                    'project_domain_name': config.get('tenant_domain', 'default'),
-                    'project_name': config.get('tenant', ''),
-                    'region_name': config.get('region', 'RegionOne')
-                }
-            }
+            self.auth_config = load_rclone_auth()
             
             print(f"✓ Loaded rclone config for user: {self.auth_config['user']}")
             print(f"✓ Auth URL: {self.auth_config['authurl']}")
@@ -87,14 +104,14 @@ class SwiftInspector:
     def connect_swift(self) -> bool:
         """Establish connection to Swift API"""
         try:
-            self.swift_conn = swift_client.Connection(**self.auth_config)
+            self.swift_conn = get_conn(self.auth_config)
             
             # Test the connection
-            account_info = self.swift_conn.head_account()
+            self.account_stats = parse_account(self.swift_conn.head_account())
             print(f"✓ Connected to Swift API successfully")
-            print(f"✓ Account containers: {account_info.get('x-account-container-count', 'unknown')}")
-            print(f"✓ Account objects: {account_info.get('x-account-object-count', 'unknown')}")
-            print(f"✓ Account bytes used: {account_info.get('x-account-bytes-used', 'unknown')}")
+            print(f"✓ Account containers: {self.account_stats.containers}")
+            print(f"✓ Account objects: {self.account_stats.objects}")
+            print(f"✓ Account bytes used: {self.account_stats.bytes}")
             
             return True
             
@@ -106,39 +123,39 @@ class SwiftInspector:
             return False
     
     def get_rclone_comparison(self) -> Dict:
-        """Get rclone data for comparison"""
+        """Report the figures 'rclone about' and 'rclone size' would show
+        
+        Both rclone commands authenticate again and walk the container on
+        their own, so the same numbers are taken from the existing Swift
+        connection and the cached object listing instead.
+        """
         print("\n" + "="*60)
         print("RCLONE COMPARISON DATA")
         print("="*60)
         
         rclone_data = {}
-        remote = "swissbackup:mattermost-backups"
         
         try:
-            # Get rclone about info
-            result = subprocess.run(
-                ['rclone', 'about', remote],
-                capture_output=True, text=True, check=False
-            )
-            rclone_data['about'] = result.stdout.strip()
-            print("Rclone 'about' output:")
+            # 'rclone about' reports the container usage headers
+            self._get_container_info()
+            container = self.container_stats
+            rclone_data['about'] = f"Used:    {_fmt_size(container.bytes)}\nObjects: {container.objects}"
+            print("Container usage (as 'rclone about'):")
             print(rclone_data['about'])
             
         except Exception as e:
-            print(f"Failed to get rclone about: {e}")
+            print(f"Failed to get container usage: {e}")
         
         try:
-            # Get rclone size info
-            result = subprocess.run(
-                ['rclone', 'size', remote],
-                capture_output=True, text=True, check=False
-            )
-            rclone_data['size'] = result.stdout.strip()
-            print("\nRclone 'size' output:")
+            # 'rclone size' sums the object listing
+            objects = self._get_all_objects()
+            total_size = self._get_total_bytes()
+            rclone_data['size'] = f"Total objects: {len(objects)}\nTotal size: {_fmt_size(total_size)}"
+            print("\nListing totals (as 'rclone size'):")
             print(rclone_data['size'])
             
         except Exception as e:
-            print(f"Failed to get rclone size: {e}")
+            print(f"Failed to get listing totals: {e}")
         
         return rclone_data
     
@@ -150,7 +167,7 @@ class SwiftInspector:
         
         try:
             # Get container info
-            container_info = self.swift_conn.head_container(self.container_name)
+            container_info = self._get_container_info()
             
             print(f"Container: {self.container_name}")
             print(f"Objects: {container_info.get('x-container-object-count', 'unknown')}")
@@ -169,60 +186,85 @@ class SwiftInspector:
             print(f"ERROR: Failed to get container info: {e}")
             return {}
     
-    def list_all_objects(self, show_details=False) -> List[Dict]:
-        """List all objects in the container"""
+    def _get_container_info(self) -> Dict:
+        """Return the container's HEAD headers, requesting them only once per run"""
+        if self._container_info is None:
+            self._container_info = self.swift_conn.head_container(self.container_name)
+            self.container_stats = parse_container(self._container_info)
+        return self._container_info
+    
+    def _get_all_objects(self) -> List[Dict]:
+        """Return the container listing, fetching it only once per run"""
+        if self._objects_cache is None:
+            self._objects_cache = list(iter_objects(self.swift_conn, self.container_name))
+            # Every report needs the total, so aggregate it once with the listing
+            self._objects_bytes = sum(map(get_bytes, self._objects_cache))
+        return self._objects_cache
+    
+    def _stream_objects(self):
+        """Yield the container's objects without keeping the listing around
+        
+        Reuses the cached listing when an earlier section already fetched it.
+        """
+        if self._objects_cache is not None:
+            yield from self._objects_cache
+        else:
+            yield from iter_objects(self.swift_conn, self.container_name)
+    
+    def _get_total_bytes(self) -> int:
+        """Return the summed size of all objects in the cached listing"""
+        self._get_all_objects()
+        return self._objects_bytes
+    
+    def list_all_objects(self, show_details=False) -> Tuple[int, int]:
+        """List all objects in the container, returning (count, total bytes)"""
         print("\n" + "="*60)
         print("ALL OBJECTS IN CONTAINER")
         print("="*60)
         
-        all_objects = []
-        marker = None
-        total_size = 0
-        
         try:
-            while True:
-                # Get objects in batches
-                headers, objects = self.swift_conn.get_container(
-                    self.container_name,
-                    marker=marker,
-                    limit=1000,
-                    full_listing=True
-                )
-                
-                if not objects:
-                    break
-                
-                all_objects.extend(objects)
-                marker = objects[-1]['name']
-            
-            print(f"Found {len(all_objects)} objects")
-            
             if show_details:
                 print("\nDetailed object listing:")
                 print("-" * 80)
                 print(f"{'Name':<40} {'Size':<12} {'Last Modified':<20} {'ETag':<32}")
                 print("-" * 80)
                 
-                for obj in all_objects:
-                    size_mb = obj['bytes'] / (1024 * 1024)
-                    print(f"{obj['name']:<40} {size_mb:>8.2f} MB {obj['last_modified']:<20} {obj.get('hash', 'N/A'):<32}")
-                    total_size += obj['bytes']
+                # Print rows as the listing streams in, flushing a page of
+                # rows per write instead of one print per object
+                count = 0
+                total_size = 0
+                lines = []
+                # Bind the append method once for the hot loop
+                add_line = lines.append
+                for obj in self._stream_objects():
+                    obj_bytes = get_bytes(obj)
+                    size_mb = obj_bytes / (1024 * 1024)
+                    add_line(f"{obj['name']:<40} {size_mb:>8.2f} MB {obj['last_modified']:<20} {obj.get('hash', 'N/A'):<32}")
+                    total_size += obj_bytes
+                    count += 1
+                    if len(lines) >= LISTING_PAGE_SIZE:
+                        _write_lines(lines)
+                        lines.clear()
+                _write_lines(lines)
+                
+                print(f"\nFound {count} objects")
             else:
-                # Just calculate total size
-                total_size = sum(obj['bytes'] for obj in all_objects)
+                count = len(self._get_all_objects())
+                total_size = self._get_total_bytes()
+                print(f"Found {count} objects")
             
             total_mb = total_size / (1024 * 1024)
             total_gb = total_size / (1024 * 1024 * 1024)
             
             print(f"\nTotal calculated size: {total_size:,} bytes ({total_mb:.2f} MB / {total_gb:.2f} GB)")
             
-            return all_objects
+            return count, total_size
             
         except ClientException as e:
             print(f"ERROR: Failed to list objects: {e}")
-            return []
+            return 0, 0
     
-    def analyze_backup_directories(self) -> Dict:
+    def analyze_backup_directories(self) -> Dict[str, BackupDir]:
         """Analyze backup directories structure"""
         print("\n" + "="*60)
         print("BACKUP DIRECTORIES ANALYSIS")
@@ -231,27 +273,18 @@ class SwiftInspector:
         backup_analysis = {}
         
         try:
-            # Get all objects
-            headers, objects = self.swift_conn.get_container(
-                self.container_name,
-                full_listing=True
-            )
-            
             # Group by backup directory
-            backup_dirs = {}
-            for obj in objects:
+            backup_dirs = defaultdict(list)
+            for obj in self._get_all_objects():
                 # Extract backup directory (first part of path)
-                parts = obj['name'].split('/')
-                if len(parts) >= 2 and re.match(r'^\d{8}_\d{6}$', parts[0]):
-                    backup_dir = parts[0]
-                    if backup_dir not in backup_dirs:
-                        backup_dirs[backup_dir] = []
+                backup_dir, sep, _ = obj['name'].partition('/')
+                if sep and _BACKUP_RE(backup_dir):
                     backup_dirs[backup_dir].append(obj)
             
             print(f"Found {len(backup_dirs)} backup directories:")
             
             for backup_dir, objects in backup_dirs.items():
-                total_size = sum(obj['bytes'] for obj in objects)
+                total_size = sum(map(get_bytes, objects))
                 size_mb = total_size / (1024 * 1024)
                 
                 print(f"\n{backup_dir}:")
@@ -259,15 +292,13 @@ class SwiftInspector:
                 print(f"  Size: {size_mb:.2f} MB")
                 print(f"  Files:")
                 
+                lines = []
                 for obj in objects:
                     obj_size_mb = obj['bytes'] / (1024 * 1024)
-                    print(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB")
+                    lines.append(f"    {obj['name']:<50} {obj_size_mb:>8.2f} MB")
+                _write_lines(lines)
                 
-                backup_analysis[backup_dir] = {
-                    'objects': len(objects),
-                    'total_size': total_size,
-                    'files': objects
-                }
+                backup_analysis[backup_dir] = BackupDir(len(objects), total_size, objects)
             
             return backup_analysis
             
@@ -282,21 +313,20 @@ class SwiftInspector:
         print("="*60)
         
         try:
-            # Check account-level stats
-            account_info = self.swift_conn.head_account()
-            account_bytes = int(account_info.get('x-account-bytes-used', 0))
+            # Account-level stats were read when connecting
+            account_bytes = self.account_stats.bytes
             
-            # Get container-level stats
-            container_info = self.swift_conn.head_container(self.container_name)
-            container_bytes = int(container_info.get('x-container-bytes-used', 0))
+            # Container-level stats are shared with the earlier sections
+            self._get_container_info()
+            container = self.container_stats
+            container_bytes = container.bytes
             
             # Calculate object-level total
-            headers, objects = self.swift_conn.get_container(self.container_name, full_listing=True)
-            object_bytes = sum(obj['bytes'] for obj in objects)
+            object_bytes = self._get_total_bytes()
             
-            print(f"Account total bytes: {account_bytes:,} ({account_bytes / (1024**3):.3f} GB)")
-            print(f"Container bytes: {container_bytes:,} ({container_bytes / (1024**3):.3f} GB)")
-            print(f"Object sum bytes: {object_bytes:,} ({object_bytes / (1024**3):.3f} GB)")
+            print(f"Account total bytes: {account_bytes:,} ({self.account_stats.gib:.3f} GB)")
+            print(f"Container bytes: {container_bytes:,} ({container.gib:.3f} GB)")
+            print(f"Object sum bytes: {object_bytes:,} ({object_bytes / GIB:.3f} GB)")
             
             # Check for discrepancies
             container_vs_objects = container_bytes - object_bytes
@@ -326,12 +356,12 @@ class SwiftInspector:
                     name = container['name']
                     size = container['bytes']
                     count = container['count']
-                    print(f"  {name}: {count} objects, {size:,} bytes ({size / (1024**3):.3f} GB)")
+                    print(f"  {name}: {count} objects, {size:,} bytes ({size / GIB:.3f} GB)")
             
         except Exception as e:
             print(f"ERROR during hidden data investigation: {e}")
     
-    def run_full_investigation(self):
+    def run_full_investigation(self, show_details=False):
         """Run complete storage investigation"""
         print("SwiftBackup Storage Inspector")
         print("=" * 60)
@@ -345,7 +375,7 @@ class SwiftInspector:
         # Run all investigations
         rclone_data = self.get_rclone_comparison()
         container_info = self.analyze_container()
-        all_objects = self.list_all_objects(show_details=True)
+        object_count, object_bytes = self.list_all_objects(show_details=show_details)
         backup_analysis = self.analyze_backup_directories()
         self.check_for_hidden_data()
         
@@ -353,7 +383,7 @@ class SwiftInspector:
         print("INVESTIGATION SUMMARY")
         print("="*60)
         print("This investigation compared multiple data sources:")
-        print("1. rclone 'about' and 'size' commands")
+        print("1. rclone 'about' and 'size' equivalents")
         print("2. Swift API container metadata")
         print("3. Swift API object listing and sizes")
         print("4. Account-level storage statistics")
@@ -366,6 +396,49 @@ class SwiftInspector:
         print("- Provider-specific backup/snapshot features")
         
         return True
+    
+    def run_json_listing(self) -> bool:
+        """Emit the container listing as NDJSON for downstream tooling
+        
+        Writes one {"n": name, "b": bytes} line per object, then a final
+        summary line. Sizes are raw bytes. Status and error messages go to
+        stderr so stdout stays machine-readable.
+        """
+        with redirect_stdout(sys.stderr):
+            if not self.load_rclone_config() or not self.connect_swift():
+                return False
+        
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        count = 0
+        total_size = 0
+        lines = []
+        add_line = lines.append
+        
+        try:
+            for obj in self._stream_objects():
+                obj_bytes = get_bytes(obj)
+                add_line(dumps({'n': obj['name'], 'b': obj_bytes}))
+                total_size += obj_bytes
+                count += 1
+                if len(lines) >= LISTING_PAGE_SIZE:
+                    _write_lines(lines)
+                    lines.clear()
+            _write_lines(lines)
+            
+            self._get_container_info()
+            container = self.container_stats
+        except ClientException as e:
+            print(f"ERROR: Failed to list objects: {e}", file=sys.stderr)
+            return False
+        
+        _write_lines([dumps({
+            'container': self.container_name,
+            'objects': count,
+            'bytes': total_size,
+            'reported_objects': container.objects,
+            'reported_bytes': container.bytes
+        })])
+        return True
 
 
 def main():
@@ -374,6 +447,8 @@ def main():
                        help='Show detailed object listings')
     parser.add_argument('--container', default='mattermost-backups',
                        help='Container name to investigate (default: mattermost-backups)')
+    parser.add_argument('--json', action='store_true',
+                       help='Emit the object listing and a summary as NDJSON instead of the report')
     
     args = parser.parse_args()
     
@@ -381,7 +456,10 @@ def main():
     inspector.container_name = args.container
     
     try:
-        success = inspector.run_full_investigation()
+        if args.json:
+            success = inspector.run_json_listing()
+        else:
+            success = inspector.run_full_investigation(show_details=args.details)
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\nInvestigation interrupted by user")
@@ -0,0 +1,186 @@
+"""
+Shared helpers for the Swift storage inspection scripts
+
+Used by check-all-containers.py, deep-swift-scan.py and swift-inspector.py.
+"""
+
+import configparser
+import functools
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from swiftclient import client as swift_client
+
+# Largest page Swift returns by default (container_listing_limit)
+LISTING_PAGE_SIZE = 10000
+
+# Concurrent requests used when fanning out per-container calls
+MAX_WORKERS = 16
+
+GIB = 1 << 30
+
+# Swift listings cannot be projected down to selected fields, so the next
+# best thing for the hot loops is a C-level getter bound once
+get_bytes = itemgetter('bytes')
+
+
+@dataclass(frozen=True, slots=True)
+class AccountStats:
+    """Usage figures from a HEAD account response"""
+    containers: int
+    objects: int
+    bytes: int
+
+    @property
+    def gib(self) -> float:
+        return self.bytes / GIB
+
+
+@dataclass(frozen=True, slots=True)
+class ContainerStats:
+    """Usage figures from a HEAD container response"""
+    objects: int
+    bytes: int
+
+    @property
+    def gib(self) -> float:
+        return self.bytes / GIB
+
+
+def parse_account(headers: Dict) -> AccountStats:
+    """Parse the usage headers of head_account() once"""
+    return AccountStats(
+        int(headers.get('x-account-container-count', 0)),
+        int(headers.get('x-account-object-count', 0)),
+        int(headers.get('x-account-bytes-used', 0))
+    )
+
+
+def parse_container(headers: Dict) -> ContainerStats:
+    """Parse the usage headers of head_container() once"""
+    return ContainerStats(
+        int(headers.get('x-container-object-count', 0)),
+        int(headers.get('x-container-bytes-used', 0))
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def load_rclone_auth() -> Dict:
+    """Load Swift credentials from the swissbackup rclone remote
+
+    The result is cached, so rclone is only run once per process. Callers
+    share the returned dict and must not modify it. Raises
+    subprocess.CalledProcessError if rclone cannot show the remote.
+    """
+    result = subprocess.run(
+        ['rclone', 'config', 'show', 'swissbackup'],
+        capture_output=True, text=True, check=True
+    )
+    
+    # rclone prints the remote as an INI section; interpolation is disabled
+    # because keys and passwords may legitimately contain '%'
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read_string(result.stdout)
+    config = dict(parser['swissbackup'])
+    
+    # Map rclone config to Swift auth parameters
+    return {
+        'authurl': config.get('auth', ''),
+        'user': config.get('user', ''),
+        'key': config.get('key', ''),
+        'tenant_name': config.get('tenant', ''),
+        'auth_version': '3',
+        'os_options': {
+            'user_domain_name': config.get('domain', 'default'),
+            'project_domain_name': config.get('tenant_domain', 'default'),
+            'project_name': config.get('tenant', ''),
+            'region_name': config.get('region', 'RegionOne')
+        }
+    }
+
+
+# Connection shared by everything in the process so the auth token and the
+# underlying keep-alive HTTP session are reused instead of re-authenticating
+_CONN: Optional[swift_client.Connection] = None
+
+
+def get_conn(auth_config: Dict) -> swift_client.Connection:
+    """Return the process-wide Swift connection, creating it on first use"""
+    global _CONN
+    if _CONN is None:
+        _CONN = swift_client.Connection(
+            retries=5,
+            starting_backoff=1,
+            insecure=False,
+            **auth_config
+        )
+    return _CONN
+
+
+def map_concurrently(conn: swift_client.Connection, func: Callable,
+                     items: Iterable, max_workers: int = MAX_WORKERS) -> List:
+    """Return [func(worker_conn, item) for item in items], run on a thread pool
+
+    swiftclient connections are not thread-safe, so every worker thread gets
+    its own Connection. They are pre-authenticated with the storage URL and
+    token of conn, so the fan-out does not trigger extra logins. Results are
+    returned in the order of items.
+    """
+    url, token = conn.url, conn.token
+    if not token:
+        url, token = conn.get_auth()
+
+    local = threading.local()
+
+    def call(item):
+        worker_conn = getattr(local, 'conn', None)
+        if worker_conn is None:
+            worker_conn = local.conn = swift_client.Connection(
+                authurl=conn.authurl,
+                user=conn.user,
+                key=conn.key,
+                auth_version=conn.auth_version,
+                os_options=conn.os_options,
+                preauthurl=url,
+                preauthtoken=token,
+                retries=conn.retries,
+                starting_backoff=conn.starting_backoff,
+                insecure=conn.insecure
+            )
+        return func(worker_conn, item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(call, items))
+
+
+def iter_objects(conn, container, **kwargs):
+    """Yield objects of a container one at a time, fetching a page at a time
+
+    Unlike get_container(full_listing=True) this never holds more than one
+    page in memory, and callers can start processing as soon as the first
+    page arrives. Each page is a separate request, so the connection's own
+    retries resume from the current marker instead of restarting the whole
+    listing. Extra keyword arguments (prefix, delimiter, ...) are passed on
+    to get_container.
+    """
+    marker = kwargs.pop('marker', None)
+    # Everything but the marker is fixed for the whole walk
+    get_page = functools.partial(
+        conn.get_container, container, limit=LISTING_PAGE_SIZE, **kwargs
+    )
+    while True:
+        headers, objects = get_page(marker=marker)
+
+        # An empty page marks the end; a short page may just mean the
+        # server caps listings below LISTING_PAGE_SIZE
+        if not objects:
+            return
+
+        yield from objects
+
+        last = objects[-1]
+        marker = last.get('name', last.get('subdir'))